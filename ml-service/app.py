@@ -6,9 +6,14 @@ Fetches historical stock data from Yahoo Finance and computes technical indicato
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import yfinance as yf
-import pandas as pd
 import numpy as np
+import orjson
+import requests
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+import threading
 import logging
 import os
 
@@ -18,10 +23,61 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def jsonify_fast(obj, status=200):
+    """
+    jsonify replacement backed by orjson
+
+    Prediction payloads are float-heavy; orjson serializes them several
+    times faster than stdlib json and understands numpy scalars natively.
+    """
+    return app.response_class(
+        orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+# Cache predictions per symbol for 15 minutes so repeat requests skip the
+# Yahoo Finance round-trip entirely
+_prediction_cache = TTLCache(maxsize=512, ttl=900)
+_cache_lock = threading.Lock()
+
+# Session reused for direct chart-endpoint fetches (keep-alive)
+_http = requests.Session()
+_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+
+
+def fetch_closes(symbol):
+    """
+    Fetch one year of daily closes straight from Yahoo's chart v8 endpoint
+
+    yfinance builds a full DataFrame with timezone localization and
+    adjustment columns per call; only the close array is used downstream,
+    so parse it out of the raw JSON instead.
+
+    Returns a float32 ndarray, or None so the caller can fall back to
+    yfinance.
+    """
+    try:
+        response = _http.get(
+            _CHART_URL.format(symbol=symbol),
+            params={"range": "1y", "interval": "1d"},
+            headers={"User-Agent": "Mozilla/5.0"},
+            timeout=10
+        )
+        response.raise_for_status()
+        result = response.json()['chart']['result'][0]
+        # Missing sessions come through as nulls -> NaN
+        close = np.asarray(
+            result['indicators']['quote'][0]['close'], dtype=np.float32)
+        close = close[~np.isnan(close)]
+        return close if close.size >= 2 else None
+    except Exception as e:
+        logger.info(f"Direct chart fetch failed for {symbol}: {str(e)}")
+        return None
 
-def calculate_sma(data, window):
-    """Calculate Simple Moving Average"""
-    return data.rolling(window=window).mean()
+
+# Shared RNG for mock data - one vectorized draw per call instead of a
+# random module call per field
+_rng = np.random.default_rng()
+_TRENDS = ("BULLISH", "BEARISH", "NEUTRAL")
 
 
 def generate_mock_prediction(symbol):
@@ -29,17 +85,15 @@ def generate_mock_prediction(symbol):
     Generate mock prediction data when yfinance fails
     This allows the system to function for demonstration purposes
     """
-    import random
-    
-    # Generate realistic-looking mock data
-    base_return = random.uniform(0.05, 0.15)  # 5-15% annual return
-    base_volatility = random.uniform(0.15, 0.35)  # 15-35% volatility
+    # Generate realistic-looking mock data in a single uniform draw:
+    # 5-15% annual return, 15-35% volatility, $50-200 price
+    base_return, base_volatility, mock_price = _rng.uniform(
+        [0.05, 0.15, 50], [0.15, 0.35, 200])
     risk_score = min(100, max(0, base_volatility * 200))  # Scale to 0-100
-    
+
     # Random trend
-    trends = ["BULLISH", "BEARISH", "NEUTRAL"]
-    trend = random.choice(trends)
-    
+    trend = _TRENDS[_rng.integers(len(_TRENDS))]
+
     # Signal based on trend
     if trend == "BULLISH":
         signal = "BUY"
@@ -47,10 +101,7 @@ def generate_mock_prediction(symbol):
         signal = "SELL"
     else:
         signal = "HOLD"
-    
-    # Mock price
-    mock_price = random.uniform(50, 200)
-    
+
     return {
         "symbol": symbol,
         "expectedReturn": float(base_return),
@@ -66,6 +117,107 @@ def generate_mock_prediction(symbol):
     }
 
 
+def compute_indicators(symbol, close):
+    """
+    Calculate technical indicators from an array of daily closes
+
+    Args:
+        symbol: Stock ticker symbol
+        close: 1-D float ndarray of closing prices, oldest first
+
+    Returns:
+        Dictionary with predictions and metrics
+    """
+    # Calculate daily returns directly on the NumPy array - avoids the
+    # pandas dispatch overhead of pct_change()/.std()/.mean() per request
+    returns = np.empty(close.size - 1, dtype=np.float32)
+    np.divide(close[1:] - close[:-1], close[:-1], out=returns)
+
+    # Calculate volatility (standard deviation of returns)
+    volatility = returns.std(ddof=1) * np.sqrt(252)  # Annualized volatility
+
+    # Calculate expected return (mean of daily returns)
+    expected_return = returns.mean() * 252  # Annualized return
+    
+    # Calculate SMAs - only the latest window mean is used downstream,
+    # so a tail slice beats computing the full rolling series
+    latest_close = close[-1]
+    latest_sma20 = float(close[-20:].mean()) if close.size >= 20 else None
+    latest_sma50 = float(close[-50:].mean()) if close.size >= 50 else None
+
+    # Trend classification
+    if latest_sma20 is None or latest_sma50 is None:
+        trend = "NEUTRAL"
+    elif latest_sma20 > latest_sma50:
+        trend = "BULLISH"
+    else:
+        trend = "BEARISH"
+    
+    # Risk score (0-100, higher = riskier)
+    risk_score = min(100, max(0, volatility * 100))
+    
+    # Signal generation
+    if trend == "BULLISH" and expected_return > 0.05:
+        signal = "BUY"
+    elif trend == "BEARISH" or expected_return < -0.05:
+        signal = "SELL"
+    else:
+        signal = "HOLD"
+    
+    return {
+        "symbol": symbol,
+        "expectedReturn": float(expected_return),
+        "volatility": float(volatility),
+        "riskScore": float(risk_score),
+        "trend": trend,
+        "signal": signal,
+        "currentPrice": float(latest_close),
+        "sma20": latest_sma20,
+        "sma50": latest_sma50,
+        "dataPoints": int(close.size)
+    }
+
+
+def fetch_batch_predictions(stocks):
+    """
+    Fetch history for several symbols in one batched Yahoo Finance call
+
+    A single multi-ticker download replaces N per-symbol round-trips.
+    Returns a dict of symbol -> prediction for the symbols the batch
+    covered; symbols missing from the result fall back to the per-ticker
+    path in the caller.
+    """
+    predictions = {}
+    try:
+        data = yf.download(
+            " ".join(stocks),
+            period="1y",
+            interval="1d",
+            group_by='ticker',
+            threads=True,
+            progress=False
+        )
+        if data is None or data.empty:
+            return predictions
+
+        for symbol in stocks:
+            try:
+                hist = data[symbol] if len(stocks) > 1 else data
+                hist = hist.dropna(subset=['Close'])
+                if hist.empty:
+                    continue
+                close = hist['Close'].to_numpy(dtype=np.float32, copy=False)
+                predictions[symbol] = compute_indicators(symbol, close)
+            except Exception as e:
+                logger.warning(f"Batch data unusable for {symbol}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Batched download failed: {str(e)}")
+
+    return predictions
+
+
+@cached(_prediction_cache, key=lambda symbol, period_days=252: hashkey(symbol),
+        lock=_cache_lock)
 def calculate_technical_indicators(symbol, period_days=252):
     """
     Fetch stock data and calculate technical indicators
@@ -78,7 +230,14 @@ def calculate_technical_indicators(symbol, period_days=252):
         Dictionary with predictions and metrics
     """
     try:
-        # Fetch historical data - try multiple methods
+        logger.info(f"Processing stock: {symbol}")
+
+        # Fast path: raw chart JSON, no DataFrame construction
+        close = fetch_closes(symbol)
+        if close is not None:
+            return compute_indicators(symbol, close)
+
+        # Fallback: fetch historical data via yfinance - try multiple methods
         ticker = yf.Ticker(symbol)
         hist = None
         
@@ -106,57 +265,10 @@ def calculate_technical_indicators(symbol, period_days=252):
         if hist is None or hist.empty:
             logger.warning(f"No data found for {symbol}, using mock data")
             return generate_mock_prediction(symbol)
-        
-        # Calculate daily returns
-        hist['DailyReturn'] = hist['Close'].pct_change()
-        
-        # Calculate volatility (standard deviation of returns)
-        volatility = hist['DailyReturn'].std() * np.sqrt(252)  # Annualized volatility
-        
-        # Calculate expected return (mean of daily returns)
-        expected_return = hist['DailyReturn'].mean() * 252  # Annualized return
-        
-        # Calculate SMAs
-        hist['SMA20'] = calculate_sma(hist['Close'], 20)
-        hist['SMA50'] = calculate_sma(hist['Close'], 50)
-        
-        # Get latest values
-        latest_close = hist['Close'].iloc[-1]
-        latest_sma20 = hist['SMA20'].iloc[-1]
-        latest_sma50 = hist['SMA50'].iloc[-1]
-        
-        # Trend classification
-        if pd.isna(latest_sma20) or pd.isna(latest_sma50):
-            trend = "NEUTRAL"
-        elif latest_sma20 > latest_sma50:
-            trend = "BULLISH"
-        else:
-            trend = "BEARISH"
-        
-        # Risk score (0-100, higher = riskier)
-        risk_score = min(100, max(0, volatility * 100))
-        
-        # Signal generation
-        if trend == "BULLISH" and expected_return > 0.05:
-            signal = "BUY"
-        elif trend == "BEARISH" or expected_return < -0.05:
-            signal = "SELL"
-        else:
-            signal = "HOLD"
-        
-        return {
-            "symbol": symbol,
-            "expectedReturn": float(expected_return),
-            "volatility": float(volatility),
-            "riskScore": float(risk_score),
-            "trend": trend,
-            "signal": signal,
-            "currentPrice": float(latest_close),
-            "sma20": float(latest_sma20) if not pd.isna(latest_sma20) else None,
-            "sma50": float(latest_sma50) if not pd.isna(latest_sma50) else None,
-            "dataPoints": len(hist)
-        }
-    
+
+        close = hist['Close'].to_numpy(dtype=np.float32, copy=False)
+        return compute_indicators(symbol, close)
+
     except Exception as e:
         logger.error(f"Error processing {symbol}: {str(e)}")
         # Fallback: Generate mock data for demonstration
@@ -191,27 +303,55 @@ def predict():
         if not isinstance(stocks, list) or len(stocks) == 0:
             return jsonify({"error": "Stocks must be a non-empty list"}), 400
         
-        results = []
-        for symbol in stocks:
-            logger.info(f"Processing stock: {symbol}")
-            prediction = calculate_technical_indicators(symbol)
-            
-            if prediction:
-                results.append(prediction)
-            else:
-                results.append({
-                    "symbol": symbol,
-                    "error": "Failed to fetch or process data"
-                })
+        # Serve recently-computed symbols straight from the cache
+        with _cache_lock:
+            predictions = {
+                symbol: _prediction_cache[hashkey(symbol)]
+                for symbol in stocks if hashkey(symbol) in _prediction_cache
+            }
+
+        # Single batched download for the rest; only symbols the batch
+        # missed pay for individual fetches (threaded to overlap the I/O)
+        uncached = [symbol for symbol in stocks if symbol not in predictions]
+        if uncached:
+            fetched = fetch_batch_predictions(uncached)
+            with _cache_lock:
+                for symbol, prediction in fetched.items():
+                    _prediction_cache[hashkey(symbol)] = prediction
+            predictions.update(fetched)
+
+        missing = [symbol for symbol in stocks if symbol not in predictions]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(16, len(missing))) as executor:
+                for symbol, prediction in zip(
+                        missing, executor.map(calculate_technical_indicators, missing)):
+                    if prediction:
+                        predictions[symbol] = prediction
+
+        results = [
+            predictions.get(symbol) or {
+                "symbol": symbol,
+                "error": "Failed to fetch or process data"
+            }
+            for symbol in stocks
+        ]
         
-        return jsonify({
+        return jsonify_fast({
             "predictions": results,
             "timestamp": datetime.now().isoformat()
-        }), 200
-    
+        })
+
     except Exception as e:
         logger.error(f"Error in /predict endpoint: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify_fast({"error": str(e)}, status=500)
+
+
+@app.route('/cache/clear', methods=['POST'])
+def clear_cache():
+    """Clear the per-symbol prediction cache"""
+    with _cache_lock:
+        _prediction_cache.clear()
+    return jsonify({"message": "Prediction cache cleared"}), 200
 
 
 @app.route('/predict/single', methods=['POST'])
@@ -244,6 +384,8 @@ def predict_single():
 
 
 if __name__ == '__main__':
+    # Local development entry point - production runs under gunicorn
+    # (see Dockerfile) so /predict requests don't serialize on one thread
     port = int(os.environ.get('PORT', 5001))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
 
@@ -8,13 +8,21 @@ FREE Models Used:
 - No paid APIs required!
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
 import os
 import logging
 from pathlib import Path
 from typing import List, Dict
-import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+import re
+import uuid
+
+import faiss
+import numpy as np
+import orjson
+import torch
 
 # LangChain imports
 try:
@@ -22,6 +30,8 @@ try:
     from langchain.text_splitter import RecursiveCharacterTextSplitter
     from langchain_community.embeddings import HuggingFaceEmbeddings
     from langchain_community.vectorstores import FAISS
+    from langchain_community.vectorstores.utils import DistanceStrategy
+    from langchain_community.docstore.in_memory import InMemoryDocstore
     from langchain.schema import Document
 except ImportError:
     # Fallback for older langchain versions
@@ -29,6 +39,8 @@ except ImportError:
     from langchain.text_splitter import RecursiveCharacterTextSplitter
     from langchain.embeddings import HuggingFaceEmbeddings
     from langchain.vectorstores import FAISS
+    from langchain.vectorstores.utils import DistanceStrategy
+    from langchain.docstore.in_memory import InMemoryDocstore
     from langchain.schema import Document
 
 app = Flask(__name__)
@@ -37,101 +49,443 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def jsonify_fast(obj, status=200):
+    """
+    jsonify replacement backed by orjson
+
+    Compliance responses carry long citation strings and many floats;
+    orjson serializes them several times faster than stdlib json.
+    """
+    return app.response_class(
+        orjson.dumps(obj), status=status, mimetype='application/json')
+
 # Configuration
 REGULATIONS_DIR = os.getenv('REGULATIONS_DIR', '/app/regulations')
 EMBEDDINGS_DIR = os.getenv('EMBEDDINGS_DIR', '/app/embeddings')
-CHUNK_SIZE = 400
-CHUNK_OVERLAP = 80
+# ~1000 chars is roughly 200-250 tokens - comfortably inside MiniLM's
+# window. The previous 400/80 split produced ~2.5x more chunks than
+# needed, multiplying embedding work and index size for no retrieval gain
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+
+# Corpus size at which the vector store trades the HNSW graph for a
+# compressed IVF-PQ index (needs enough points to train the codebooks)
+IVFPQ_MIN_CHUNKS = 10000
 
 # FREE embedding model options (no API key needed!)
 EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
 
+# 'torch' (default), 'onnx', 'onnx-int8' or 'static' - the ONNX export
+# runs 2-4x faster on CPU, the int8-quantized export roughly doubles that
+# again on VNNI-capable hardware, and 'static' swaps the transformer for
+# Model2Vec lookup-and-pool vectors (~500x faster, modest recall cost).
+# All free, all local.
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')
+
+# Distilled static model used by the 'static' backend
+STATIC_EMBEDDING_MODEL = os.getenv('STATIC_EMBEDDING_MODEL', 'minishlab/M2V_base_output')
+
+# Quantized export shipped in the model repo for onnx-int8
+ONNX_INT8_FILE = os.getenv('ONNX_INT8_FILE', 'onnx/model_qint8_avx512_vnni.onnx')
+
+# Spread index-build encoding across worker processes (torch backend).
+# Off by default: the pool only pays for itself on large corpora.
+EMBEDDING_MULTI_PROCESS = os.getenv('EMBEDDING_MULTI_PROCESS', 'false').lower() == 'true'
+
 # Alternative FREE models you can use:
 # - sentence-transformers/all-mpnet-base-v2 (better quality, larger)
 # - sentence-transformers/paraphrase-MiniLM-L6-v2 (good for paraphrase)
 # - sentence-transformers/multi-qa-MiniLM-L6-cos-v1 (optimized for Q&A)
 
+# Shared splitter - built once so /regulations/reload doesn't recompile
+# the separator logic on every rebuild
+TEXT_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    length_function=len,
+)
+
+# Maximum single-stock allocation per risk profile
+CONCENTRATION_THRESHOLDS = {
+    "LOW": 0.15,
+    "MEDIUM": 0.25,
+    "HIGH": 0.35
+}
+
+# Compliance keywords compiled into one case-insensitive alternation so
+# each retrieved chunk is scanned once, with no lowercased copy of it
+_KEYWORD_PATTERN = re.compile('|'.join(map(re.escape, (
+    'high risk', 'limit', 'maximum', 'concentration', 'single stock'
+))), re.IGNORECASE)
+
+# Retrieval query per risk profile. The query text is static apart from
+# the profile, so the three embeddings are precomputed when the vector
+# store is (re)built and request-time search skips the encoder entirely.
+_QUERY_TEMPLATE = (
+    "Investment portfolio compliance check Risk profile: {profile} "
+    "concentration limits single stock maximum allocation"
+)
+_profile_query_vectors = {}
+
 # Global vector store
 vector_store = None
 
+# Embeddings model singleton - loading the sentence-transformer weights
+# costs seconds and hundreds of MB, so build the model once per process
+_embeddings_singleton = None
+
+
+def _load_one_pdf(path: str) -> List[Document]:
+    """Load a single PDF file (module-level so pool workers can run it)"""
+    return PyPDFLoader(path).load()
+
 
 def load_pdf_documents(directory: str) -> List[Document]:
     """Load all PDF and text files from the regulations directory"""
     documents = []
     reg_dir = Path(directory)
-    
+
     if not reg_dir.exists():
         logger.warning(f"Regulations directory {directory} does not exist")
         return documents
-    
-    # Load PDF files
-    pdf_files = list(reg_dir.glob('*.pdf'))
+
+    # One directory scan partitions files by suffix - the separate
+    # *.pdf / *.txt globs each walked the directory again
+    pdf_files = []
+    txt_files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name.endswith('.pdf'):
+                pdf_files.append(Path(entry.path))
+            elif entry.name.endswith('.txt'):
+                txt_files.append(Path(entry.path))
+    pdf_files.sort()
+    txt_files.sort()
     logger.info(f"Found {len(pdf_files)} PDF files")
-    
-    for pdf_file in pdf_files:
-        try:
-            logger.info(f"Loading PDF: {pdf_file.name}")
-            loader = PyPDFLoader(str(pdf_file))
-            docs = loader.load()
-            documents.extend(docs)
-        except Exception as e:
-            logger.error(f"Error loading {pdf_file}: {str(e)}")
+
+    # Load PDF files - parsing is CPU-bound inside pypdf, so parse the
+    # files across worker processes instead of one at a time
+    if pdf_files:
+        with ProcessPoolExecutor() as executor:
+            futures = [
+                (pdf_file, executor.submit(_load_one_pdf, str(pdf_file)))
+                for pdf_file in pdf_files
+            ]
+            for pdf_file, future in futures:
+                try:
+                    documents.extend(future.result())
+                except Exception as e:
+                    logger.error(f"Error loading {pdf_file}: {str(e)}")
     
     # Also load text files for easier testing
-    txt_files = list(reg_dir.glob('*.txt'))
     logger.info(f"Found {len(txt_files)} text files")
-    
-    for txt_file in txt_files:
-        try:
-            logger.info(f"Loading text file: {txt_file.name}")
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                doc = Document(
-                    page_content=content,
-                    metadata={"source": str(txt_file)}
-                )
-                documents.append(doc)
-        except Exception as e:
-            logger.error(f"Error loading {txt_file}: {str(e)}")
-    
+
+    def _read_txt(txt_file: Path) -> Document:
+        return Document(
+            page_content=txt_file.read_text(encoding='utf-8'),
+            metadata={"source": str(txt_file)}
+        )
+
+    if txt_files:
+        # Reads overlap on I/O, so threads are enough here (the PDF loop
+        # above needs processes because parsing is CPU-bound)
+        with ThreadPoolExecutor(max_workers=min(8, len(txt_files))) as executor:
+            futures = [
+                (txt_file, executor.submit(_read_txt, txt_file))
+                for txt_file in txt_files
+            ]
+            for txt_file, future in futures:
+                try:
+                    documents.append(future.result())
+                except Exception as e:
+                    logger.error(f"Error loading {txt_file}: {str(e)}")
+
     return documents
 
 
+def _detect_device() -> str:
+    """
+    Pick the fastest available torch device, unless EMBEDDING_DEVICE
+    forces one (e.g. 'cpu' for the Docker image on a GPU host)
+    """
+    override = os.getenv('EMBEDDING_DEVICE')
+    if override:
+        return override
+    if torch.cuda.is_available():
+        return 'cuda'
+    if torch.backends.mps.is_available():
+        return 'mps'
+    return 'cpu'
+
+
+class ONNXEmbeddings:
+    """
+    Embeddings served through the Sentence Transformers ONNX export
+
+    onnxruntime runs MiniLM-class models 2-4x faster than the PyTorch
+    FP32 path on CPU, and the int8-quantized export adds another ~2x on
+    VNNI-capable CPUs at a slight accuracy cost. Implements the
+    embed_documents/embed_query pair LangChain's FAISS wrapper expects.
+    """
+
+    def __init__(self, model_name: str, device: str, quantized: bool = False):
+        from sentence_transformers import SentenceTransformer
+        model_kwargs = {'file_name': ONNX_INT8_FILE} if quantized else {}
+        self.model = SentenceTransformer(
+            model_name, device=device, backend='onnx', model_kwargs=model_kwargs)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(
+            texts, batch_size=256, normalize_embeddings=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode([text], normalize_embeddings=True)[0].tolist()
+
+
+class StaticEmbeddings:
+    """
+    Model2Vec static embeddings - no transformer forward pass at all
+
+    Coarse regulation retrieval tolerates the accuracy trade-off, and a
+    lookup-and-pool encode is microseconds per query on CPU. Applied to
+    documents and queries alike so index and query vectors stay in the
+    same space (embedding only queries this way would break retrieval).
+    """
+
+    def __init__(self, model_name: str):
+        from model2vec import StaticModel
+        self.model = StaticModel.from_pretrained(model_name)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self.model.encode(texts), dtype=np.float32)
+        # Normalize so inner product stays equivalent to cosine
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
 def initialize_embeddings():
     """
-    Initialize FREE HuggingFace embeddings model
+    Initialize FREE embeddings model (PyTorch or ONNX backend)
     Runs completely locally - no API key or internet needed after download!
     """
-    logger.info(f"Using FREE HuggingFace embeddings: {EMBEDDING_MODEL}")
-    
-    # This downloads the model once and caches it locally
-    return HuggingFaceEmbeddings(
+    global _embeddings_singleton
+
+    if _embeddings_singleton is not None:
+        return _embeddings_singleton
+
+    device = _detect_device()
+    logger.info(
+        f"Using FREE embeddings: {EMBEDDING_MODEL} "
+        f"({EMBEDDING_BACKEND} backend, {device})"
+    )
+
+    if EMBEDDING_BACKEND == 'static':
+        _embeddings_singleton = StaticEmbeddings(STATIC_EMBEDDING_MODEL)
+        return _embeddings_singleton
+
+    if EMBEDDING_BACKEND in ('onnx', 'onnx-int8'):
+        _embeddings_singleton = ONNXEmbeddings(
+            EMBEDDING_MODEL, device, quantized=(EMBEDDING_BACKEND == 'onnx-int8'))
+        return _embeddings_singleton
+
+    # This downloads the model once and caches it locally. Large encode
+    # batches amortize per-batch torch overhead during index builds.
+    _embeddings_singleton = HuggingFaceEmbeddings(
         model_name=EMBEDDING_MODEL,
-        model_kwargs={'device': 'cpu'},  # Use 'cuda' if GPU available
-        encode_kwargs={'normalize_embeddings': True}
+        model_kwargs={'device': device},
+        encode_kwargs={'normalize_embeddings': True, 'batch_size': 256},
+        multi_process=EMBEDDING_MULTI_PROCESS
+    )
+    return _embeddings_singleton
+
+
+@lru_cache(maxsize=1024)
+def _embed_query_cached(text: str) -> tuple:
+    """
+    LRU wrapper around embed_query
+
+    Resubmitted portfolios, retries and dashboard polls issue identical
+    queries; caching the vector saves a full transformer forward pass per
+    hit. Vectors stay valid across /regulations/reload because the
+    embeddings model lives for the whole process.
+    """
+    return tuple(initialize_embeddings().embed_query(text))
+
+
+def build_vector_store(chunks, embeddings):
+    """
+    Build a FAISS vector store over the chunks with an HNSW index
+
+    The default flat index scans every chunk on each query; HNSW keeps
+    near-exact recall with sub-linear search time as the corpus grows.
+    Vectors are stored 8-bit scalar-quantized, which cuts index memory
+    ~4x versus float32 and speeds the scan via int8 SIMD kernels. Very
+    large corpora switch to IVF-PQ, whose 16-byte codes and SIMD
+    distance tables compress memory ~100x and keep search fast once the
+    vectors stop fitting in cache.
+    Embeddings are normalized, so inner product equals cosine similarity.
+    """
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    n, dim = vectors.shape
+
+    if n >= IVFPQ_MIN_CHUNKS:
+        # Enough points to train the PQ codebooks properly
+        nlist = min(1024, int(4 * np.sqrt(n)))
+        index = faiss.index_factory(
+            dim, f"IVF{nlist},PQ16x8", faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.index_factory(dim, "HNSW32,SQ8", faiss.METRIC_INNER_PRODUCT)
+        # Graph effort tuned for the k=5 queries check_compliance issues:
+        # efSearch=16 keeps recall near-exact at that depth,
+        # efConstruction=40 bounds build time on reloads
+        index.hnsw.efConstruction = 40
+        index.hnsw.efSearch = 16
+
+    if not index.is_trained:
+        # SQ learns per-dimension ranges; IVF-PQ learns coarse centroids
+        # and sub-vector codebooks
+        index.train(vectors)
+    index.add(vectors)
+
+    if hasattr(index, 'nprobe'):
+        # Probe a handful of IVF cells per query for recall at low latency
+        index.nprobe = 16
+
+    ids = [str(uuid.uuid4()) for _ in chunks]
+    return FAISS(
+        embedding_function=_embed_query_cached,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, chunks))),
+        index_to_docstore_id=dict(enumerate(ids)),
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
     )
 
 
+def _active_model_name() -> str:
+    """Model the configured backend actually embeds with"""
+    return STATIC_EMBEDDING_MODEL if EMBEDDING_BACKEND == 'static' else EMBEDDING_MODEL
+
+
+def _saved_index_matches(index_path: Path) -> bool:
+    """
+    Check that a saved index was built with the configured embedding model
+
+    Without this guard, switching EMBEDDING_MODEL silently loads an index
+    built in a different vector space and every query misses.
+    """
+    meta_file = index_path / "meta.json"
+    if not meta_file.exists():
+        return False
+    try:
+        meta = orjson.loads(meta_file.read_bytes())
+    except Exception as e:
+        logger.warning(f"Could not read index metadata: {str(e)}")
+        return False
+    saved = (meta.get('model'), meta.get('backend', 'torch'))
+    current = (_active_model_name(), EMBEDDING_BACKEND)
+    if saved != current:
+        logger.info(
+            f"Saved index was built with {saved}, current configuration "
+            f"is {current} - rebuilding"
+        )
+        return False
+    return True
+
+
+def _save_vector_store(store: FAISS, index_path: Path):
+    """
+    Persist the store as a raw FAISS index plus an orjson docstore
+
+    save_local pickles the docstore and id map; writing them as orjson is
+    several times faster, keeps the on-disk format inspectable, and the
+    index itself (already quantized) goes through faiss.write_index.
+    """
+    index_path.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(store.index, str(index_path / "index.faiss"))
+    payload = {
+        'index_to_docstore_id': store.index_to_docstore_id,
+        'docs': {
+            doc_id: {
+                'page_content': doc.page_content,
+                'metadata': doc.metadata
+            }
+            for doc_id, doc in store.docstore._dict.items()
+        }
+    }
+    (index_path / "docstore.json").write_bytes(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS))
+
+
+def _load_vector_store(index_path: Path) -> FAISS:
+    """Load a store persisted by _save_vector_store"""
+    index_file = str(index_path / "index.faiss")
+    try:
+        # Mmap the index so the OS pages vectors in on demand - instant
+        # startup and a small resident set instead of reading the whole
+        # file into RAM up front
+        index = faiss.read_index(
+            index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except Exception as e:
+        # Not every index type supports mmap reads
+        logger.warning(f"Mmap load failed ({str(e)}), reading index into RAM")
+        index = faiss.read_index(index_file)
+    payload = orjson.loads((index_path / "docstore.json").read_bytes())
+    docs = {
+        doc_id: Document(
+            page_content=entry['page_content'], metadata=entry['metadata'])
+        for doc_id, entry in payload['docs'].items()
+    }
+    return FAISS(
+        embedding_function=_embed_query_cached,
+        index=index,
+        docstore=InMemoryDocstore(docs),
+        index_to_docstore_id={
+            int(position): doc_id
+            for position, doc_id in payload['index_to_docstore_id'].items()
+        },
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
+
+def _warm_query_vectors():
+    """Precompute the per-risk-profile query embeddings"""
+    global _profile_query_vectors
+    embeddings = initialize_embeddings()
+    _profile_query_vectors = {
+        profile: embeddings.embed_query(_QUERY_TEMPLATE.format(profile=profile))
+        for profile in ("LOW", "MEDIUM", "HIGH")
+    }
+
+
 def create_vector_store():
     """Create or load FAISS vector store from PDF documents"""
     global vector_store
-    
+
     embeddings_dir = Path(EMBEDDINGS_DIR)
     embeddings_dir.mkdir(parents=True, exist_ok=True)
-    
+
     index_path = embeddings_dir / "faiss_index"
-    
-    # Check if vector store already exists
-    if index_path.exists() and (index_path / "index.faiss").exists():
+
+    # Check if a vector store for this embedding model already exists
+    if ((index_path / "index.faiss").exists()
+            and (index_path / "docstore.json").exists()
+            and _saved_index_matches(index_path)):
         logger.info("Loading existing vector store")
         try:
-            embeddings = initialize_embeddings()
-            vector_store = FAISS.load_local(
-                str(index_path), 
-                embeddings,
-                allow_dangerous_deserialization=True  # Safe since we created it
-            )
+            initialize_embeddings()
+            vector_store = _load_vector_store(index_path)
             logger.info("Vector store loaded successfully")
+            _warm_query_vectors()
             return
         except Exception as e:
             logger.warning(f"Error loading vector store: {str(e)}. Recreating...")
@@ -181,23 +535,25 @@ def create_vector_store():
         documents = [Document(page_content=sample_content, metadata={"source": "sample_regulation.txt"})]
     
     # Split documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-    )
-    
-    chunks = text_splitter.split_documents(documents)
+    chunks = TEXT_SPLITTER.split_documents(documents)
     logger.info(f"Created {len(chunks)} document chunks")
     
     # Create embeddings and vector store (FREE!)
     embeddings = initialize_embeddings()
-    vector_store = FAISS.from_documents(chunks, embeddings)
+    vector_store = build_vector_store(chunks, embeddings)
     
-    # Save vector store for future use
-    vector_store.save_local(str(index_path))
+    # Save vector store for future use, with a sidecar recording which
+    # embedding model produced it
+    _save_vector_store(vector_store, index_path)
+    (index_path / "meta.json").write_bytes(orjson.dumps({
+        'model': _active_model_name(),
+        'backend': EMBEDDING_BACKEND,
+        'dim': int(vector_store.index.d)
+    }))
     logger.info(f"Vector store saved to {index_path}")
 
+    _warm_query_vectors()
+
 
 def check_compliance(portfolio: Dict, risk_profile: str, risk_metrics: Dict) -> Dict:
     """
@@ -212,67 +568,70 @@ def check_compliance(portfolio: Dict, risk_profile: str, risk_metrics: Dict) ->
             "citations": []
         }
     
-    # Build query from portfolio and risk profile
-    query_parts = [
-        f"Investment portfolio compliance check",
-        f"Risk profile: {risk_profile}",
-        f"Portfolio allocation percentages: {json.dumps(portfolio)}",
-        "concentration limits single stock maximum allocation"
-    ]
-    query = " ".join(query_parts)
-    
-    # Search for relevant regulations using FREE local embeddings
+    rp_upper = risk_profile.upper()
+
+    # Search for relevant regulations using FREE local embeddings.
+    # Retrieval only depends on the risk profile - the rule checks below
+    # consume the portfolio directly - so the warm per-profile vector
+    # skips the encoder; unknown profiles embed on demand (LRU-cached).
     try:
-        docs = vector_store.similarity_search_with_score(query, k=5)
-        
+        query_vector = _profile_query_vectors.get(rp_upper)
+        if query_vector is None:
+            query_vector = _embed_query_cached(
+                _QUERY_TEMPLATE.format(profile=rp_upper))
+        docs = vector_store.similarity_search_with_score_by_vector(
+            query_vector, k=5)
+
         violations = []
         warnings = []
         citations = []
-        
+
+        # Loop invariants, computed once per request rather than per doc
+        threshold = CONCENTRATION_THRESHOLDS.get(rp_upper, 0.25)
+        max_allocation = max(portfolio.values()) if portfolio else 0
+        total_allocation = sum(portfolio.values()) if portfolio else 0
+        concentration_flagged = False
+
         # Analyze retrieved documents for compliance rules
         for doc, score in docs:
             content = doc.page_content
             source = doc.metadata.get('source', 'Unknown')
-            
+            # Resolved once per doc and reused by every branch below
+            source_name = Path(source).name if source != 'Unknown' else source
+
             citations.append({
                 "text": content[:500],
-                "source": Path(source).name if source != 'Unknown' else source,
-                "relevance_score": float(1 / (1 + score))  # Convert distance to similarity
+                "source": source_name,
+                "relevance_score": float(score)  # IP on normalized vectors == cosine
             })
             
-            content_lower = content.lower()
-            
-            # Check for concentration limits based on risk profile
-            max_allocation = max(portfolio.values()) if portfolio else 0
-            
-            if "concentration" in content_lower or "single stock" in content_lower:
-                # Risk profile specific thresholds
-                thresholds = {
-                    "LOW": 0.15,
-                    "MEDIUM": 0.25,
-                    "HIGH": 0.35
-                }
-                threshold = thresholds.get(risk_profile.upper(), 0.25)
-                
-                if max_allocation > threshold:
+            # One pass over the chunk collects every keyword hit; only the
+            # matches themselves get lowercased, not the whole chunk
+            keywords = {match.lower() for match in _KEYWORD_PATTERN.findall(content)}
+
+            # Check for concentration limits based on risk profile - every
+            # relevant doc used to append the same violation, deduplicated
+            # in a second pass; flag it once at the source instead
+            if "concentration" in keywords or "single stock" in keywords:
+                if max_allocation > threshold and not concentration_flagged:
+                    concentration_flagged = True
                     violations.append({
                         "type": "CONCENTRATION",
                         "message": f"Single stock allocation ({max_allocation*100:.1f}%) exceeds {risk_profile} risk profile limit ({threshold*100:.0f}%)",
                         "severity": "HIGH",
-                        "source": Path(source).name
+                        "source": source_name
                     })
             
             # Check for high-risk asset limits
-            if risk_profile.upper() == "LOW" and "high risk" in content_lower:
-                if "limit" in content_lower or "maximum" in content_lower:
+            if rp_upper == "LOW" and "high risk" in keywords:
+                if "limit" in keywords or "maximum" in keywords:
                     warnings.append({
                         "type": "RISK_LIMIT",
                         "message": "Low risk profile has restrictions on high-risk assets (max 20%)",
-                        "source": Path(source).name
+                        "source": source_name
                     })
         
         # Rule-based checks (always applied)
-        total_allocation = sum(portfolio.values()) if portfolio else 0
         if abs(total_allocation - 1.0) > 0.01:
             violations.append({
                 "type": "ALLOCATION",
@@ -290,7 +649,7 @@ def check_compliance(portfolio: Dict, risk_profile: str, risk_metrics: Dict) ->
             })
         
         # Risk profile specific checks
-        if risk_profile.upper() == "LOW":
+        if rp_upper == "LOW":
             high_risk_stocks = [
                 symbol for symbol, metrics in risk_metrics.items()
                 if isinstance(metrics, dict) and metrics.get('riskScore', 0) > 70
@@ -302,17 +661,9 @@ def check_compliance(portfolio: Dict, risk_profile: str, risk_metrics: Dict) ->
                     "source": "System"
                 })
         
-        # Remove duplicate violations
-        seen_messages = set()
-        unique_violations = []
-        for v in violations:
-            if v['message'] not in seen_messages:
-                seen_messages.add(v['message'])
-                unique_violations.append(v)
-        
         return {
-            "compliant": len(unique_violations) == 0,
-            "violations": unique_violations,
+            "compliant": len(violations) == 0,
+            "violations": violations,
             "warnings": warnings,
             "citations": citations[:3]  # Top 3 most relevant
         }
@@ -331,12 +682,12 @@ def check_compliance(portfolio: Dict, risk_profile: str, risk_metrics: Dict) ->
 def health():
     """Health check endpoint"""
     status = "healthy" if vector_store is not None else "initializing"
-    return jsonify({
-        "status": status, 
+    return jsonify_fast({
+        "status": status,
         "service": "rag-service",
         "embedding_model": EMBEDDING_MODEL,
         "cost": "FREE (no paid APIs)"
-    }), 200
+    })
 
 
 @app.route('/compliance/check', methods=['POST'])
@@ -349,19 +700,19 @@ def compliance_check():
         data = request.get_json()
         
         if not data:
-            return jsonify({"error": "Missing request body"}), 400
+            return jsonify_fast({"error": "Missing request body"}, status=400)
         
         portfolio = data.get('portfolio', {})
         risk_profile = data.get('riskProfile', 'MEDIUM')
         risk_metrics = data.get('riskMetrics', {})
         
         result = check_compliance(portfolio, risk_profile, risk_metrics)
-        
-        return jsonify(result), 200
-    
+
+        return jsonify_fast(result)
+
     except Exception as e:
         logger.error(f"Error in /compliance/check: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify_fast({"error": str(e)}, status=500)
 
 
 @app.route('/regulations/reload', methods=['POST'])
@@ -369,19 +720,19 @@ def reload_regulations():
     """Reload regulations and rebuild vector store"""
     try:
         create_vector_store()
-        return jsonify({
+        return jsonify_fast({
             "message": "Regulations reloaded successfully",
             "embedding_model": EMBEDDING_MODEL
-        }), 200
+        })
     except Exception as e:
         logger.error(f"Error reloading regulations: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify_fast({"error": str(e)}, status=500)
 
 
 @app.route('/info', methods=['GET'])
 def info():
     """Service information - shows FREE status"""
-    return jsonify({
+    return jsonify_fast({
         "service": "RAG Compliance Engine",
         "version": "2.0.0",
         "embedding_model": EMBEDDING_MODEL,
@@ -394,17 +745,33 @@ def info():
             "Compliance rule checking",
             "Citation retrieval"
         ]
-    }), 200
+    })
+
+
+def create_app():
+    """
+    Gunicorn entry point
+
+    With --preload the model load and index build happen once in the
+    master; forked workers share the FAISS index and embeddings through
+    copy-on-write pages.
+    """
+    # Warming the embeddings singleton first makes the model download/load
+    # cost visible at startup rather than mid-request
+    initialize_embeddings()
+    create_vector_store()
+    return app
 
 
 if __name__ == '__main__':
+    # Local development entry point - production runs under gunicorn
+    # (see Dockerfile) so compliance checks don't serialize on one thread
     logger.info("=" * 50)
     logger.info("RAG Service - 100% FREE (No Paid APIs)")
     logger.info(f"Embedding Model: {EMBEDDING_MODEL}")
     logger.info("=" * 50)
-    
-    # Initialize on startup
-    create_vector_store()
-    
+
+    create_app()
+
     port = int(os.environ.get('PORT', 5002))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)